@@ -107,6 +107,6 @@ class Kiwi:
                                 "Uber, Ola",
                                 "Uber, Ola, Zoomy",
                                 "Ola"]
-        geo_df["num_operators"] = geo_df["operators"].apply(lambda x: len(x.split(",")))
+        geo_df["num_operators"] = geo_df["operators"].str.count(",") + 1
 
         return df_operators, geo_df
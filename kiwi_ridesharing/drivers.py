@@ -4,6 +4,7 @@ import sqlite3
 from kiwi_ridesharing.data import Kiwi
 from kiwi_ridesharing.ride import Ride
 import os
+import glob
 
 root_dir = os.path.dirname(os.path.dirname(__file__))
 db_path = os.path.join(root_dir, "kiwi_ridesharing", "data")
@@ -11,6 +12,14 @@ db_path = os.path.join(root_dir, "kiwi_ridesharing", "data")
 conn = sqlite3.connect(os.path.join(db_path, 'kiwi_datawarehouse.db'))
 db = conn.cursor()
 
+# columns of get_driver_training_data used as model features, in matrix order
+TRAINING_FEATURES = ['max_consecutive_offline', 'last_online', 'ride_count',
+                     'total_distance', 'total_driving_time', 'total_earned',
+                     'prime_time_rides', 'average_speed', 'average_waittime',
+                     'average_response_time', 'rides_weekday', 'rides_weekend',
+                     'lifetime_in_days', 'kiwi_average_monthly_revenue',
+                     'average_lifetime_value']
+
 class Driver:
     '''
     DataFrames containing all rides as index,
@@ -378,9 +387,93 @@ class Driver:
                 ).filter(regex="^(?!.*DROP)")
 
         return full_data[['driver_id', 'driver_onboard_date', 'first_ride', 'last_ride',
-        'is_churn', 'max_consecutive_offline',
-        'last_online', 'ride_count', 'total_distance', 'total_driving_time',
-        'total_earned', 'prime_time_rides', 'average_speed', 'average_waittime',
-        'average_response_time', 'rides_weekday', 'rides_weekend',
-        'lifetime_in_days', 'kiwi_average_monthly_revenue',
-        'average_lifetime_value']].dropna()
+                          'is_churn'] + TRAINING_FEATURES].dropna()
+
+    def get_training_matrix(self, training_data=None):
+
+        """
+        Returns a tuple (features, labels, driver_ids, feature_names) built from
+        get_driver_training_data, ready to be handed to a model:
+        features is a C-contiguous float32 matrix of the TRAINING_FEATURES
+        columns, labels the int8 "is_churn" vector and driver_ids the matching
+        driver ids. Raises ValueError if a feature column is not numeric
+
+        Parameters:
+            training_data -> DataFrame: output of get_driver_training_data,
+            computed if not given
+        """
+
+        if training_data is None:
+            training_data = self.get_driver_training_data()
+
+        feature_names = list(TRAINING_FEATURES)
+
+        # filled column by column, so each value is copied once into the final matrix;
+        # to_numeric also converts object columns (e.g. from sqlite) and raises on text
+        features = np.empty((len(training_data), len(feature_names)), dtype=np.float32)
+        for j, name in enumerate(feature_names):
+            features[:, j] = pd.to_numeric(training_data[name], errors="raise")
+        labels = training_data["is_churn"].to_numpy(dtype=np.int8)
+        # fixed-width strings so the ids can be saved and memory-mapped without pickling
+        driver_ids = training_data["driver_id"].to_numpy(dtype=str)
+
+        return features, labels, driver_ids, feature_names
+
+    def export_training_data(self, path, file_format="npy", shard_size=100000, training_data=None):
+
+        """
+        Writes the training matrix to path in shards of shard_size rows and
+        returns the list of written files
+
+        Parameters:
+            path -> str: output directory, created if it does not exist;
+            part-* shards and feature_names.npy left there by an earlier export
+            are deleted first, other files are kept
+            file_format -> str: "npy" writes features/labels/driver_ids .npy files
+            per shard (loadable with np.load(..., mmap_mode="r")) plus
+            feature_names.npy, "parquet" writes one parquet file per shard
+            (requires pyarrow)
+            shard_size -> int: maximum number of rows per shard
+            training_data -> DataFrame: output of get_driver_training_data,
+            computed if not given
+        """
+
+        if file_format not in ("npy", "parquet"):
+            raise ValueError(f"file_format must be 'npy' or 'parquet', got {file_format!r}")
+        if shard_size <= 0:
+            raise ValueError(f"shard_size must be a positive number of rows, got {shard_size}")
+
+        features, labels, driver_ids, feature_names = self.get_training_matrix(training_data)
+        os.makedirs(path, exist_ok=True)
+
+        # stale shards of a previous export would be read back as duplicated rows
+        for stale_file in glob.glob(os.path.join(path, "part-*.npy")) +\
+                glob.glob(os.path.join(path, "part-*.parquet")) +\
+                glob.glob(os.path.join(path, "feature_names.npy")):
+            os.remove(stale_file)
+
+        written = []
+        if file_format == "npy":
+            names_file = os.path.join(path, "feature_names.npy")
+            np.save(names_file, np.array(feature_names))
+            written.append(names_file)
+        else:
+            # wraps the float32 matrix without copying it
+            export = pd.DataFrame(features, columns=feature_names, copy=False)
+            export.insert(0, "driver_id", driver_ids)
+            export["is_churn"] = labels
+
+        for shard, start in enumerate(range(0, len(labels), shard_size)):
+            stop = start + shard_size
+
+            if file_format == "npy":
+                for name, values in (("features", features), ("labels", labels), ("driver_ids", driver_ids)):
+                    shard_file = os.path.join(path, f"part-{shard:05d}.{name}.npy")
+                    np.save(shard_file, values[start:stop])
+                    written.append(shard_file)
+            else:
+                shard_file = os.path.join(path, f"part-{shard:05d}.parquet")
+                export.iloc[start:stop].to_parquet(shard_file, index=False)
+                written.append(shard_file)
+
+        return written
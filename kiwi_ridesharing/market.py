@@ -0,0 +1,138 @@
+import pandas as pd
+import numpy as np
+from kiwi_ridesharing.data import Kiwi
+
+# mean earth radius in km
+EARTH_RADIUS_KM = 6371.0088
+
+class Market:
+    '''
+    Prebuilt lookup of Kiwi's markets (cities) and the competitors operating
+    in each of them, used to annotate ride pickup locations in bulk
+    '''
+    def __init__(self):
+        self.operators, self.markets = Kiwi().get_competitor_data()
+        self.operator_names = list(self.operators["operator"])
+        self.market_names = list(self.markets["name"])
+
+        # market coordinates in radians, computed once for every lookup
+        self._lat = np.radians(self.markets["lat"].to_numpy(dtype=np.float64))
+        self._lon = np.radians(self.markets["lon"].to_numpy(dtype=np.float64))
+        self._cos_lat = np.cos(self._lat)
+
+        self.presence = self._get_presence_bitmask()
+        self.num_competitors = np.array([bin(x).count("1") for x in self.presence],
+                                        dtype=np.int8)
+
+    def _get_presence_bitmask(self):
+
+        """
+        Function that returns an array with one bitmask per market, where bit i
+        is set if the i-th operator of self.operators is present in that market
+        """
+
+        presence = np.zeros(len(self.markets), dtype=np.uint8)
+        for i, operators in enumerate(self.markets["operators"]):
+            for operator in operators.split(","):
+                presence[i] |= 1 << self.operator_names.index(operator.strip())
+
+        return presence
+
+    def get_operator_bit(self, operator):
+
+        """
+        Function that returns the bit used for operator in the presence bitmask
+        """
+
+        return np.uint8(1 << self.operator_names.index(operator))
+
+    def get_nearest_market(self, lat, lon, chunk_size=100000, max_distance_km=None):
+
+        """
+        Function that returns two arrays: the index of the nearest market
+        (in self.markets) and the great-circle distance to it in km,
+        for every pickup location. Locations with a missing or non-finite
+        coordinate get index -1 and distance NaN
+
+        Parameters:
+            lat, lon -> scalar or 1-D array-like: pickup coordinates in degrees
+            chunk_size -> int: number of locations compared against all
+            markets at once, bounds the size of temporary arrays
+            max_distance_km -> float: if given, locations further than this
+            from every market get index -1 (their distance is still returned)
+        """
+
+        lat = np.radians(np.atleast_1d(np.asarray(lat, dtype=np.float64)))
+        lon = np.radians(np.atleast_1d(np.asarray(lon, dtype=np.float64)))
+
+        if lat.ndim != 1 or lat.shape != lon.shape:
+            raise ValueError(f"lat and lon must be 1-D with the same length, got shapes {lat.shape} and {lon.shape}")
+
+        nearest = np.empty(lat.shape[0], dtype=np.intp)
+        distance = np.empty(lat.shape[0], dtype=np.float64)
+
+        for start in range(0, lat.shape[0], chunk_size):
+            stop = start + chunk_size
+            chunk_lat = lat[start:stop, None]
+            chunk_lon = lon[start:stop, None]
+
+            # haversine term, monotonic in distance so argmin can be taken on it;
+            # non-finite coordinates are masked below, so their warnings are silenced
+            with np.errstate(invalid="ignore"):
+                hav = np.sin((chunk_lat - self._lat) / 2) ** 2 +\
+                      np.cos(chunk_lat) * self._cos_lat * np.sin((chunk_lon - self._lon) / 2) ** 2
+
+            idx = hav.argmin(axis=1)
+            nearest[start:stop] = idx
+            distance[start:stop] = 2 * EARTH_RADIUS_KM *\
+                np.arcsin(np.sqrt(np.clip(hav[np.arange(idx.shape[0]), idx], 0, 1)))
+
+        # argmin returns 0 for all-NaN rows, do not attribute them to a market
+        missing = ~(np.isfinite(lat) & np.isfinite(lon))
+        nearest[missing] = -1
+        distance[missing] = np.nan
+
+        if max_distance_km is not None:
+            nearest[distance > max_distance_km] = -1
+
+        return nearest, distance
+
+    def get_market_data(self, lat, lon, chunk_size=100000, max_distance_km=None):
+
+        """
+        Returns a DataFrame with one row per pickup location and columns
+        ['market', 'market_distance_km', 'operators_mask', 'num_competitors'],
+        market is NaN and the counts 0 for locations with missing coordinates
+        or, if max_distance_km is given, further than that from every market.
+        Without max_distance_km every location gets its nearest market however
+        far away it is, filter on market_distance_km if that matters
+
+        Parameters:
+            lat, lon -> scalar or 1-D array-like: pickup coordinates in degrees
+            chunk_size -> int: see get_nearest_market
+            max_distance_km -> float: see get_nearest_market
+        """
+
+        nearest, distance = self.get_nearest_market(lat, lon, chunk_size=chunk_size,
+                                                    max_distance_km=max_distance_km)
+        found = nearest >= 0
+
+        # locations without a market have no operators and no competitors
+        operators_mask = np.zeros(nearest.shape[0], dtype=self.presence.dtype)
+        operators_mask[found] = self.presence[nearest[found]]
+        num_competitors = np.zeros(nearest.shape[0], dtype=self.num_competitors.dtype)
+        num_competitors[found] = self.num_competitors[nearest[found]]
+
+        return pd.DataFrame({"market": pd.Categorical.from_codes(nearest, categories=self.market_names),
+                             "market_distance_km": distance,
+                             "operators_mask": operators_mask,
+                             "num_competitors": num_competitors})
+
+    def is_operator_present(self, operators_mask, operator):
+
+        """
+        Function that returns a boolean array indicating for every row of
+        operators_mask whether operator is present in that market
+        """
+
+        return (np.asarray(operators_mask) & self.get_operator_bit(operator)) != 0
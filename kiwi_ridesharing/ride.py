@@ -2,7 +2,7 @@ from os import kill
 import pandas as pd
 import numpy as np
 from kiwi_ridesharing.data import Kiwi
-from kiwi_ridesharing.utils import convert_meters_to_miles
+from kiwi_ridesharing.utils import get_fare
 
 class Ride:
     '''
@@ -105,6 +105,15 @@ class Ride:
         return wait_time[["ride_id", "arrived_at", "picked_up_at", "driver_response_time"]]
 
 
+    def get_fare(self, ride_duration_minutes, ride_distance_meters, primetime):
+
+        """
+        Returns the fare of a single ride in dollars, including the primetime
+        bonus and never below the minimum fare
+        """
+
+        return get_fare(ride_duration_minutes, ride_distance_meters, primetime, self.misc_data)
+
     def get_full_rides_data(self, clean_data=True):
 
         """
@@ -140,26 +149,9 @@ class Ride:
                     self.data["rides"][["ride_id", "ride_distance"]], on='ride_id', how="right", suffixes=('', '_DROP')
                 ).filter(regex="^(?!.*DROP)")
 
-        def get_fare(ride_duration_minutes, ride_distance_meters, primetime):
-
-            distance_miles = convert_meters_to_miles(ride_distance_meters)
-
-            ride_fare = self.misc_data["base_fare"] +\
-                        (self.misc_data["cost_per_mile"] * distance_miles) +\
-                        (self.misc_data["cost_per_minute"] * ride_duration_minutes) +\
-                        self.misc_data["service_fee"]
-
-            # add primetime bonus
-            ride_fare += (primetime/100)*ride_fare
-
-            if ride_fare < 5.00:
-                return 5.00
-
-            return round(ride_fare, 2)
-
-        full_data["fare"] = full_data.apply(lambda row: get_fare(row['ride_duration_minutes'],
-                                                                 row['ride_distance'],
-                                                                 row['ride_prime_time']),
+        full_data["fare"] = full_data.apply(lambda row: self.get_fare(row['ride_duration_minutes'],
+                                                                      row['ride_distance'],
+                                                                      row['ride_prime_time']),
                                             axis=1)
 
         return full_data[['ride_id',
@@ -0,0 +1,249 @@
+import asyncio
+from collections import OrderedDict
+import pandas as pd
+import numpy as np
+from kiwi_ridesharing.data import Kiwi
+from kiwi_ridesharing.utils import get_fare
+
+EVENTS = ["requested_at", "accepted_at", "arrived_at", "picked_up_at", "dropped_off_at"]
+
+
+async def tail_file(path, follow=True, poll_interval=0.5):
+
+    """
+    Async generator yielding the lines of a ride_timestamps csv file
+
+    Parameters:
+        follow -> bool: keep waiting for new lines at the end of the file
+        (like tail -f), otherwise stop at end of file
+        poll_interval -> float: seconds to wait before checking for new lines
+    """
+
+    # binary mode so the position of a partial line can be rewound exactly
+    with open(path, "rb") as f:
+        while True:
+            line = f.readline()
+            if line.endswith(b"\n") or (line and not follow):
+                yield line.decode()
+            elif not follow:
+                return
+            else:
+                # partial or no line yet, rewind and wait for the writer
+                f.seek(f.tell() - len(line))
+                await asyncio.sleep(poll_interval)
+
+
+async def read_lines(reader):
+
+    """
+    Async generator yielding the lines received on an asyncio.StreamReader,
+    e.g. one returned by asyncio.open_connection
+    """
+
+    while True:
+        line = await reader.readline()
+        if not line:
+            return
+        yield line.decode()
+
+
+class RideStream:
+    '''
+    Assembles a live stream of ride_timestamps events into completed rides,
+    with the same wait times, response time and fare as Ride
+    '''
+    def __init__(self, max_open_rides=100000, batch_size=1000, flush_interval=1.0,
+                 clean_data=True, rides=None):
+        if rides is None:
+            rides = Kiwi().get_data()["rides"]
+
+        # only the columns needed per ride are kept, not the full Kiwi tables
+        self.rides = rides.set_index("ride_id")[["driver_id", "ride_distance",
+                                                 "ride_duration", "ride_prime_time"]]
+        self.misc_data = Kiwi().get_misc_data()
+        self.max_open_rides = max_open_rides
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.clean_data = clean_data
+
+        # ride_id -> {event: timestamp}, oldest first so it can be evicted
+        self.open_rides = OrderedDict()
+        # ride_ids already emitted, so repeated or late events do not reopen them
+        self.completed_rides = OrderedDict()
+        self.evicted_rides = 0
+        self.duplicate_events = 0
+        self.malformed_lines = 0
+
+    def parse_line(self, line):
+
+        """
+        Function that returns a (ride_id, event, timestamp) tuple for a
+        "ride_id,event,timestamp" line, or None for blank lines, the csv header
+        and malformed lines, the latter counted in malformed_lines
+        """
+
+        line = line.strip()
+        if not line or line == "ride_id,event,timestamp":
+            return None
+
+        fields = line.split(",")
+        if len(fields) != 3 or not fields[0] or fields[1] not in EVENTS:
+            self.malformed_lines += 1
+            return None
+
+        try:
+            timestamp = pd.Timestamp(fields[2])
+        except (ValueError, OverflowError):
+            timestamp = pd.NaT
+        if pd.isnull(timestamp):
+            self.malformed_lines += 1
+            return None
+
+        return fields[0], fields[1], timestamp
+
+    def add_event(self, ride_id, event, timestamp):
+
+        """
+        Function that records one event and returns the completed ride as a
+        dict once its "dropped_off_at" event is received, None otherwise.
+        When more than max_open_rides are open, the oldest one is dropped;
+        events for rides that already completed are ignored
+        """
+
+        if ride_id in self.completed_rides:
+            self.duplicate_events += 1
+            return None
+
+        events = self.open_rides.get(ride_id)
+        if events is None:
+            events = self.open_rides[ride_id] = {}
+            if len(self.open_rides) > self.max_open_rides:
+                self.open_rides.popitem(last=False)
+                self.evicted_rides += 1
+
+        events[event] = pd.Timestamp(timestamp)
+
+        if event == "dropped_off_at":
+            self.completed_rides[ride_id] = None
+            if len(self.completed_rides) > self.max_open_rides:
+                self.completed_rides.popitem(last=False)
+            return self._complete_ride(ride_id, self.open_rides.pop(ride_id))
+        return None
+
+    def _complete_ride(self, ride_id, events):
+
+        """
+        Function that returns a dict with the driver, timestamps, wait times
+        in seconds and fare of a completed ride
+        """
+
+        known = ride_id in self.rides.index
+        info = self.rides.loc[ride_id] if known else None
+
+        ride = {"ride_id": ride_id,
+                "driver_id": info["driver_id"] if known else np.nan}
+        ride.update({event: events.get(event, pd.NaT) for event in EVENTS})
+
+        if self.clean_data and pd.notnull(ride["picked_up_at"]) and\
+                (pd.isnull(ride["arrived_at"]) or ride["arrived_at"] > ride["picked_up_at"]):
+            ride["arrived_at"] = ride["picked_up_at"]
+
+        ride["driver_wait_time"] = self._seconds(ride["arrived_at"], ride["picked_up_at"])
+        ride["customer_wait_time"] = self._seconds(ride["accepted_at"], ride["arrived_at"])
+        ride["driver_response_time"] = self._seconds(ride["requested_at"], ride["accepted_at"])
+
+        # distance and duration come from the rides table, unknown rides get no fare
+        if known:
+            ride["fare"] = get_fare(round(info["ride_duration"]/60),
+                                    info["ride_distance"],
+                                    info["ride_prime_time"],
+                                    self.misc_data)
+        else:
+            ride["fare"] = np.nan
+
+        return ride
+
+    @staticmethod
+    def _seconds(start, end):
+
+        """
+        Function that returns the seconds between two timestamps, like
+        .dt.seconds in Ride, or NaN if one of them is missing
+        """
+
+        if pd.isnull(start) or pd.isnull(end):
+            return np.nan
+        return (end - start).seconds
+
+    async def _read_events(self, lines, queue):
+
+        """
+        Function that puts the parsed events of lines into the queue, then
+        None once the source is exhausted or raised
+        """
+
+        cancelled = False
+        try:
+            async for line in lines:
+                event = self.parse_line(line)
+                if event is not None:
+                    await queue.put(event)
+        except asyncio.CancelledError:
+            # run() stopped consuming, nobody waits for the marker
+            cancelled = True
+            raise
+        finally:
+            if not cancelled:
+                # waits for room in the queue, so the marker is never dropped
+                await queue.put(None)
+
+    async def run(self, lines):
+
+        """
+        Async generator yielding DataFrames of completed rides, with the
+        columns of Ride.get_ride_timestamps plus 'driver_id',
+        'driver_wait_time', 'customer_wait_time', 'driver_response_time'
+        and 'fare'.
+        A batch is emitted once batch_size rides completed or flush_interval
+        seconds passed since the last one. Errors raised by the source are
+        raised here after the rides completed so far are emitted
+
+        Parameters:
+            lines -> async iterable of str: e.g. tail_file(path) or
+            read_lines(reader)
+        """
+
+        # bounded queue so a fast source waits for the consumer
+        queue = asyncio.Queue(maxsize=self.batch_size)
+        reader = asyncio.ensure_future(self._read_events(lines, queue))
+        loop = asyncio.get_running_loop()
+
+        batch = []
+        deadline = loop.time() + self.flush_interval
+        try:
+            while True:
+                try:
+                    item = await asyncio.wait_for(queue.get(), max(deadline - loop.time(), 0))
+                except asyncio.TimeoutError:
+                    item = ()
+
+                if item is None:
+                    break
+                if item:
+                    ride = self.add_event(*item)
+                    if ride is not None:
+                        batch.append(ride)
+
+                if len(batch) >= self.batch_size or loop.time() >= deadline:
+                    if batch:
+                        yield pd.DataFrame(batch)
+                        batch = []
+                    deadline = loop.time() + self.flush_interval
+
+            if batch:
+                yield pd.DataFrame(batch)
+
+            # re-raises the error of the source, if any
+            await reader
+        finally:
+            reader.cancel()
@@ -1,2 +1,24 @@
 def convert_meters_to_miles(meters):
     return round(meters/1609.344, 4)
+
+
+def get_fare(ride_duration_minutes, ride_distance_meters, primetime, misc_data):
+    """
+    Returns the fare of a single ride in dollars, including the primetime
+    bonus and never below the minimum fare, using the prices in misc_data
+    (see Kiwi.get_misc_data)
+    """
+    distance_miles = convert_meters_to_miles(ride_distance_meters)
+
+    ride_fare = misc_data["base_fare"] +\
+                (misc_data["cost_per_mile"] * distance_miles) +\
+                (misc_data["cost_per_minute"] * ride_duration_minutes) +\
+                misc_data["service_fee"]
+
+    # add primetime bonus
+    ride_fare += (primetime/100)*ride_fare
+
+    if ride_fare < 5.00:
+        return 5.00
+
+    return round(ride_fare, 2)
@@ -0,0 +1,92 @@
+import os
+import numpy as np
+import pandas as pd
+import pytest
+from kiwi_ridesharing.drivers import Driver, TRAINING_FEATURES
+
+
+def make_training_data(n=5):
+    data = pd.DataFrame({"driver_id": [f"driver_{i:02d}" for i in range(n)],
+                         "driver_onboard_date": pd.Timestamp("2016-03-29"),
+                         "first_ride": pd.Timestamp("2016-04-01"),
+                         "last_ride": pd.Timestamp("2016-06-01"),
+                         "is_churn": [i % 2 for i in range(n)]})
+    for j, name in enumerate(TRAINING_FEATURES):
+        data[name] = np.arange(n, dtype=np.float64) + j / 10
+    # sqlite results come back as object columns
+    data["max_consecutive_offline"] = data["max_consecutive_offline"].astype(object)
+    return data
+
+
+@pytest.fixture
+def driver():
+    # the export methods only need training_data, not the Kiwi tables
+    return Driver.__new__(Driver)
+
+
+def test_training_matrix(driver):
+    data = make_training_data()
+    features, labels, driver_ids, feature_names = driver.get_training_matrix(data)
+
+    assert features.dtype == np.float32
+    assert features.flags["C_CONTIGUOUS"]
+    assert features.shape == (5, len(TRAINING_FEATURES))
+    assert feature_names == TRAINING_FEATURES
+    assert np.allclose(features, data[TRAINING_FEATURES].astype(float).to_numpy())
+    assert labels.dtype == np.int8
+    assert list(labels) == list(data["is_churn"])
+    assert list(driver_ids) == list(data["driver_id"])
+
+
+def test_non_numeric_feature_raises(driver):
+    data = make_training_data()
+    data["ride_count"] = "many"
+
+    with pytest.raises(ValueError):
+        driver.get_training_matrix(data)
+
+
+def test_invalid_shard_size_raises(driver, tmp_path):
+    for shard_size in (0, -1):
+        with pytest.raises(ValueError):
+            driver.export_training_data(tmp_path, shard_size=shard_size, training_data=make_training_data())
+
+
+def test_export_npy(driver, tmp_path):
+    data = make_training_data()
+    driver.export_training_data(tmp_path, shard_size=2, training_data=data)
+
+    features, labels, driver_ids, feature_names = driver.get_training_matrix(data)
+    shards = [np.load(tmp_path / f"part-{i:05d}.features.npy", mmap_mode="r") for i in range(3)]
+
+    assert [len(s) for s in shards] == [2, 2, 1]
+    assert isinstance(shards[0], np.memmap)
+    assert np.array_equal(np.concatenate(shards), features)
+    assert np.array_equal(np.concatenate([np.load(tmp_path / f"part-{i:05d}.labels.npy") for i in range(3)]), labels)
+    assert np.array_equal(np.concatenate([np.load(tmp_path / f"part-{i:05d}.driver_ids.npy") for i in range(3)]), driver_ids)
+    assert list(np.load(tmp_path / "feature_names.npy")) == feature_names
+
+
+def test_export_parquet(driver, tmp_path):
+    data = make_training_data()
+    written = driver.export_training_data(tmp_path, file_format="parquet", shard_size=2, training_data=data)
+
+    assert [len(pd.read_parquet(f)) for f in written] == [2, 2, 1]
+    exported = pd.read_parquet(tmp_path)
+    assert list(exported.columns) == ["driver_id"] + TRAINING_FEATURES + ["is_churn"]
+    assert list(exported["driver_id"]) == list(data["driver_id"])
+    assert (exported[TRAINING_FEATURES].dtypes == np.float32).all()
+
+
+def test_export_replaces_previous_shards(driver, tmp_path):
+    data = make_training_data()
+    driver.export_training_data(tmp_path, file_format="parquet", shard_size=2, training_data=data)
+    driver.export_training_data(tmp_path, file_format="parquet", shard_size=10, training_data=data)
+    assert len(pd.read_parquet(tmp_path)) == 5
+
+    driver.export_training_data(tmp_path, shard_size=2, training_data=data)
+    driver.export_training_data(tmp_path, shard_size=10, training_data=data)
+    assert sorted(os.listdir(tmp_path)) == ["feature_names.npy",
+                                            "part-00000.driver_ids.npy",
+                                            "part-00000.features.npy",
+                                            "part-00000.labels.npy"]
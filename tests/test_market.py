@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+from kiwi_ridesharing.market import Market
+
+
+@pytest.fixture(scope="module")
+def market():
+    return Market()
+
+
+def test_city_maps_to_itself(market):
+    data = market.get_market_data(market.markets["lat"], market.markets["lon"])
+
+    assert list(data["market"]) == market.market_names
+    assert np.allclose(data["market_distance_km"], 0, atol=1e-6)
+    assert list(data["num_competitors"]) == list(market.markets["num_operators"])
+
+
+def test_scalar_coordinates(market):
+    nearest, distance = market.get_nearest_market(-36.8, 174.7)
+    assert market.market_names[nearest[0]] == "Auckland"
+    assert distance[0] < 10
+
+
+def test_missing_coordinates_have_no_market(market):
+    data = market.get_market_data([np.nan, -41.28, -45.0], [174.7, np.nan, np.inf])
+
+    assert data["market"].isnull().all()
+    assert data["market_distance_km"].isnull().all()
+    assert (data["operators_mask"] == 0).all()
+    assert (data["num_competitors"] == 0).all()
+
+
+def test_max_distance_km(market):
+    # Wellington and London
+    data = market.get_market_data([-41.28, 51.5], [174.77, -0.12], max_distance_km=100)
+
+    assert data["market"][0] == "Wellington"
+    assert pd.isnull(data["market"][1])
+    assert data["market_distance_km"][1] > 10000
+    assert data["num_competitors"][1] == 0
+
+
+def test_invalid_shapes_raise(market):
+    with pytest.raises(ValueError):
+        market.get_nearest_market([-36.8, -41.3], [174.7])
+    with pytest.raises(ValueError):
+        market.get_nearest_market([[-36.8]], [[174.7]])
+
+
+def test_chunks_give_same_result(market):
+    rng = np.random.default_rng(0)
+    lat = rng.uniform(-47, -34, 1000)
+    lon = rng.uniform(166, 179, 1000)
+
+    pd.testing.assert_frame_equal(market.get_market_data(lat, lon, chunk_size=7),
+                                  market.get_market_data(lat, lon, chunk_size=len(lat)))
+
+
+def test_is_operator_present(market):
+    data = market.get_market_data(market.markets["lat"], market.markets["lon"])
+    zoomy = market.is_operator_present(data["operators_mask"], "Zoomy")
+
+    assert list(data["market"][zoomy]) == ["Auckland", "Christchurch", "Wellington"]
+    assert market.is_operator_present(data["operators_mask"], "Ola").all()
@@ -0,0 +1,139 @@
+import asyncio
+import numpy as np
+import pandas as pd
+import pytest
+from kiwi_ridesharing.ride import Ride
+from kiwi_ridesharing.stream import RideStream, tail_file
+
+RIDES = pd.DataFrame({"ride_id": ["r1", "r2", "r3"],
+                      "driver_id": ["d1", "d1", "d2"],
+                      "ride_distance": [1811, 3362, 10000],
+                      "ride_duration": [327, 809, 1200],
+                      "ride_prime_time": [50, 0, 25]})
+
+EVENTS = [("r1", "requested_at", "2016-04-23 02:13:50"),
+          ("r1", "accepted_at", "2016-04-23 02:14:15"),
+          ("r1", "arrived_at", "2016-04-23 02:22:00"),  # after pick up
+          ("r1", "picked_up_at", "2016-04-23 02:16:36"),
+          ("r1", "dropped_off_at", "2016-04-23 02:22:07"),
+          ("r2", "requested_at", "2016-04-23 03:00:00"),
+          ("r2", "accepted_at", "2016-04-23 03:00:20"),
+          ("r2", "picked_up_at", "2016-04-23 03:05:00"),  # no arrival
+          ("r2", "dropped_off_at", "2016-04-23 03:20:00"),
+          ("r3", "requested_at", "2016-04-23 04:00:00"),
+          ("r3", "accepted_at", "2016-04-23 04:00:30"),
+          ("r3", "arrived_at", "2016-04-23 04:04:00"),
+          ("r3", "picked_up_at", "2016-04-23 04:05:00"),
+          ("r3", "dropped_off_at", "2016-04-23 04:25:00")]
+
+
+def make_stream(**kwargs):
+    return RideStream(rides=RIDES, **kwargs)
+
+
+async def as_lines(events, delay=None):
+    yield "ride_id,event,timestamp\n"
+    for ride_id, event, timestamp in events:
+        if delay and event == "requested_at":
+            await asyncio.sleep(delay)
+        yield f"{ride_id},{event},{timestamp}\n"
+
+
+def collect(stream, lines, timeout=None):
+    async def _collect():
+        return [batch async for batch in stream.run(lines)]
+    return asyncio.run(asyncio.wait_for(_collect(), timeout))
+
+
+def test_complete_ride_matches_ride_timestamps():
+    stream = make_stream()
+    completed = [stream.add_event(*e) for e in EVENTS]
+    streamed = pd.DataFrame([r for r in completed if r is not None]).set_index("ride_id")
+
+    ride = Ride.__new__(Ride)
+    ride.data = {"timestamps": pd.DataFrame(EVENTS, columns=["ride_id", "event", "timestamp"])}
+    ride.misc_data = stream.misc_data
+    static = ride.get_ride_timestamps().set_index("ride_id")
+
+    for event in ["requested_at", "accepted_at", "arrived_at", "picked_up_at", "dropped_off_at"]:
+        assert list(streamed[event]) == list(static[event])
+
+    assert list(streamed["driver_wait_time"]) == list((static["picked_up_at"] - static["arrived_at"]).dt.seconds)
+    assert list(streamed["customer_wait_time"]) == list((static["arrived_at"] - static["accepted_at"]).dt.seconds)
+    assert list(streamed["driver_response_time"]) == list((static["accepted_at"] - static["requested_at"]).dt.seconds)
+    assert list(streamed["driver_id"]) == ["d1", "d1", "d2"]
+    assert streamed.loc["r1", "fare"] == ride.get_fare(5, 1811, 50)
+
+
+def test_unknown_ride_has_no_fare():
+    stream = make_stream()
+    ride = stream.add_event("unknown", "dropped_off_at", "2016-04-23 02:22:07")
+    assert np.isnan(ride["fare"])
+    assert pd.isnull(ride["driver_id"])
+
+
+def test_oldest_open_ride_is_evicted():
+    stream = make_stream(max_open_rides=2)
+    for ride_id in ["r1", "r2", "r3"]:
+        stream.add_event(ride_id, "requested_at", "2016-04-23 02:13:50")
+
+    assert stream.evicted_rides == 1
+    assert list(stream.open_rides) == ["r2", "r3"]
+
+
+def test_duplicate_events_do_not_reopen_rides():
+    stream = make_stream()
+    assert stream.add_event("r1", "dropped_off_at", "2016-04-23 02:22:07") is not None
+    assert stream.add_event("r1", "dropped_off_at", "2016-04-23 02:22:07") is None
+    assert stream.add_event("r1", "picked_up_at", "2016-04-23 02:16:36") is None
+    assert stream.duplicate_events == 2
+    assert "r1" not in stream.open_rides
+
+
+def test_malformed_lines_are_skipped_and_counted():
+    stream = make_stream()
+    assert stream.parse_line("ride_id,event,timestamp") is None
+    assert stream.parse_line("") is None
+    assert stream.parse_line("r1,requested_at") is None
+    assert stream.parse_line("r1,teleported_at,2016-04-23 02:13:50") is None
+    assert stream.parse_line("r1,requested_at,not a date") is None
+    assert stream.malformed_lines == 3
+    assert stream.parse_line("r1,requested_at,2016-04-23 02:13:50\n") ==\
+        ("r1", "requested_at", pd.Timestamp("2016-04-23 02:13:50"))
+
+
+def test_batches_are_flushed_on_batch_size_and_eof():
+    # more events than batch_size are queued, the end of the stream must
+    # still be seen right away instead of after flush_interval
+    batches = collect(make_stream(batch_size=2, flush_interval=60), as_lines(EVENTS), timeout=1)
+    assert [list(b["ride_id"]) for b in batches] == [["r1", "r2"], ["r3"]]
+
+
+def test_batches_are_flushed_on_interval():
+    # each ride starts after a pause longer than flush_interval
+    batches = collect(make_stream(batch_size=100, flush_interval=0.05), as_lines(EVENTS, delay=0.2))
+    assert [list(b["ride_id"]) for b in batches] == [["r1"], ["r2"], ["r3"]]
+
+
+def test_tail_file_stops_at_eof(tmp_path):
+    path = tmp_path / "ride_timestamps.csv"
+    path.write_text("ride_id,event,timestamp\n" +
+                    "\n".join(",".join(e) for e in EVENTS))  # no trailing newline
+
+    batches = collect(make_stream(flush_interval=60), tail_file(path, follow=False), timeout=1)
+    assert list(pd.concat(batches)["ride_id"]) == ["r1", "r2", "r3"]
+
+
+def test_source_errors_reach_the_consumer(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        collect(make_stream(flush_interval=60), tail_file(tmp_path / "missing.csv"), timeout=1)
+
+
+def test_source_errors_after_full_queue_reach_the_consumer():
+    async def failing_lines():
+        async for line in as_lines(EVENTS):
+            yield line
+        raise RuntimeError("connection lost")
+
+    with pytest.raises(RuntimeError):
+        collect(make_stream(batch_size=2, flush_interval=60), failing_lines(), timeout=1)